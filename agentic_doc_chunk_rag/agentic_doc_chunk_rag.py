@@ -10,6 +10,7 @@ import os
 from langgraph.graph import StateGraph, START, END
 from typing import Dict, Any, TypedDict, Set
 from langsmith import traceable
+from functools import lru_cache
 
 load_dotenv()
 
@@ -76,6 +77,11 @@ embeddings_model = AzureOpenAIEmbeddings(
     azure_endpoint=aoai_endpoint
 )
 
+@lru_cache(maxsize=4096)
+def _embed_cached(text: str) -> tuple:
+    """Embed a search query; repeated queries (e.g. across retry attempts) reuse the earlier vector."""
+    return tuple(embeddings_model.embed_query(text))
+
 def format_search_results(results: List[SearchResult]) -> str:
     """Format search results into a nicely formatted string.
     
@@ -123,7 +129,7 @@ def run_search(search_query: str, processed_ids: Set[str]) -> List[SearchResult]
         List[SearchResult]: List of search results
     """
     # Generate vector embedding for the query
-    query_vector = embeddings_model.embed_query(search_query)
+    query_vector = list(_embed_cached(search_query))
     
     vector_query = VectorizedQuery(
         vector=query_vector,
@@ -9,14 +9,15 @@ from langchain_text_splitters import TokenTextSplitter
 
 from langchain_openai.embeddings import AzureOpenAIEmbeddings
 import os
+import re
 import tiktoken
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 import fitz  # PyMuPDF
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
 
-#pip install pymupdf numpy scikit-learn
+#pip install pymupdf numpy
 #pip install pymupdf
 
 load_dotenv()
@@ -40,110 +41,141 @@ embeddings_model = AzureOpenAIEmbeddings(
 
 encoding = tiktoken.encoding_for_model(aoai_deployment)
 
+# A sentence runs up to terminal punctuation followed by whitespace (or the end
+# of the text) and keeps its trailing whitespace, so joining sentences restores
+# the original text exactly. Decimals such as "3.14" are not split.
+SENTENCE_RE = re.compile(r'.+?(?:[.!?]+(?=\s|\Z)\s*|\Z)', re.DOTALL)
+
 def num_tokens_from_string(string):
     return len(encoding.encode(string))
 
+def num_tokens_batch(strings):
+    # One call into tiktoken's Rust core, tokenizing the strings in parallel
+    return [len(tokens) for tokens in encoding.encode_ordinary_batch(strings, num_threads=os.cpu_count())]
+
 class SemanticChunker:
-    def __init__(self, embeddings_model, breakpoint_threshold=0.8):
+    def __init__(self, embeddings_model, breakpoint_threshold=0.8, normalize_embeddings=False):
         self.embeddings_model = embeddings_model
         self.breakpoint_threshold = breakpoint_threshold
+        # Azure OpenAI embeddings are already unit length, so the dot product is
+        # the cosine similarity. Set this for models that return unnormalized vectors.
+        self.normalize_embeddings = normalize_embeddings
 
     def split_text(self, text, chunk_size=1000, overlap=100):
-        sentences = text.split('. ')
-        embeddings = self.embeddings_model.embed_documents(sentences)
+        sentences = [m.group(0) for m in SENTENCE_RE.finditer(text)]
+        # Embed each distinct sentence once; repeated boilerplate reuses the vector
+        unique_sentences = list(dict.fromkeys(sentences))
+        vectors = dict(zip(unique_sentences, self.embeddings_model.embed_documents(unique_sentences)))
+        embeddings = [vectors[sentence] for sentence in sentences]
         breakpoints = self.find_breakpoints(embeddings)
         
         chunks = []
         start = 0
         for breakpoint in breakpoints:
             end = breakpoint
-            chunk = '. '.join(sentences[start:end])
+            chunk = ''.join(sentences[start:end])
             chunks.append(chunk)
             start = max(0, end - overlap)
         
         if start < len(sentences):
-            chunks.append('. '.join(sentences[start:]))
+            chunks.append(''.join(sentences[start:]))
         
         return chunks
 
     def find_breakpoints(self, embeddings):
-        similarities = cosine_similarity(embeddings)
-        breakpoints = []
-        for i in range(1, len(similarities)):
-            if similarities[i-1][i] < self.breakpoint_threshold:
-                breakpoints.append(i)
-        return breakpoints
-
-def semantic_chunking_langchain(full_text):
+        # Only consecutive sentences are compared, so compute the N-1 pair
+        # similarities directly instead of the full NxN matrix.
+        if len(embeddings) < 2:
+            return []
+        emb = np.asarray(embeddings, dtype=np.float32)
+        if self.normalize_embeddings:
+            norms = np.linalg.norm(emb, axis=1, keepdims=True)
+            norms[norms == 0] = 1
+            emb /= norms
+        similarities = np.einsum('ij,ij->i', emb[:-1], emb[1:])
+        return (np.flatnonzero(similarities < self.breakpoint_threshold) + 1).tolist()
+
+def semantic_chunking_langchain(full_text, verbose=False):
     chunker = SemanticChunker(embeddings_model)
     chunks = chunker.split_text(full_text)
-    total_tokens = 0
     
-    for i, chunk in enumerate(chunks):
-        token_count = num_tokens_from_string(chunk)
-        length = len(chunk)
-        print(f"******************Chunk {i}: Tokens: {token_count}******************")
-        print(chunk)
-        total_tokens += token_count
+    # Token counts are only reported, so skip the tokenizer pass unless asked
+    if verbose:
+        token_counts = num_tokens_batch(chunks)
+        for i, (chunk, token_count) in enumerate(zip(chunks, token_counts)):
+            print(f"******************Chunk {i}: Tokens: {token_count}******************")
+            print(chunk)
+        print(f"Total tokens: {sum(token_counts)}")
     
     return chunks
 
-def chunk_by_tokens_langchain(full_text, chunk_size=1000, chunk_overlap=100):
+def chunk_by_tokens_langchain(full_text, chunk_size=1000, chunk_overlap=100, verbose=False):
     text_splitter = TokenTextSplitter(encoding_name='gpt2', chunk_size=chunk_size, chunk_overlap=chunk_overlap)
     
     chunks = text_splitter.split_text(full_text)
-    total_tokens = 0
-    for chunk in chunks:
-        token_count = num_tokens_from_string(chunk)
-        total_tokens += token_count
+    if verbose:
+        print(f"Total tokens: {sum(num_tokens_batch(chunks))}")
     
     return chunks
 
-def recursive_character_chunking_langchain(full_text):
-    token_count = num_tokens_from_string(full_text)
-    print(f"Number of tokens: {token_count}")
-    print(f"Length of full text: {len(full_text)}")
-    
-    text_splitter = RecursiveCharacterTextSplitter(
+def _recursive_character_splitter():
+    return RecursiveCharacterTextSplitter(
         chunk_size=2500,
         chunk_overlap=250,
         length_function=len,
         is_separator_regex=False,
     )
+
+def recursive_character_chunking_langchain(full_text, verbose=False):
+    if verbose:
+        print(f"Number of tokens: {num_tokens_from_string(full_text)}")
+        print(f"Length of full text: {len(full_text)}")
+    
+    text_splitter = _recursive_character_splitter()
     texts = text_splitter.split_text(full_text)
     
-    total_tokens = 0
-    for chunk in texts:
-        token_count = num_tokens_from_string(chunk)
-        length = len(chunk)
-        print(f"Tokens: {token_count}")
-        total_tokens += token_count
+    if verbose:
+        for token_count in num_tokens_batch(texts):
+            print(f"Tokens: {token_count}")
     
     return texts
 
+def recursive_character_chunking_pages(page_texts):
+    # Same splitter settings as recursive_character_chunking_langchain, applied
+    # to each page separately: chunks never span a page break, so each one can
+    # be tagged with the page it came from. Yields (chunk, page_number) with
+    # 1-based page numbers.
+    text_splitter = _recursive_character_splitter()
+    for page_number, page_text in enumerate(page_texts, 1):
+        for chunk in text_splitter.split_text(page_text):
+            yield chunk, page_number
+
+def _save_chunk(output_dir, i, chunk):
+    chunk_filename = os.path.join(output_dir, f"chunk_{i}.txt")
+    with open(chunk_filename, 'w', encoding='utf-8') as f:
+        f.write(chunk)
+    print(f"Saved chunk {i} to {chunk_filename}")
+
 def save_chunks_to_local(chunks, output_dir):
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+    if not chunks:
+        return
     
-    for i, chunk in enumerate(chunks):
-        chunk_filename = os.path.join(output_dir, f"chunk_{i}.txt")
-        with open(chunk_filename, 'w', encoding='utf-8') as f:
-            f.write(chunk)
-        print(f"Saved chunk {i} to {chunk_filename}")
+    # File writes release the GIL, so overlap them across a small thread pool
+    with ThreadPoolExecutor(max_workers=min(32, len(chunks))) as executor:
+        list(executor.map(lambda item: _save_chunk(output_dir, *item), enumerate(chunks)))
 
 def run_examples():
     #sample_pdf_path = 'path/to/your/sample/document.pdf'
     
     # Read the PDF file and extract text
     with fitz.open(sample_pdf_path) as doc:
-        full_text = ""
-        for page in doc:
-            full_text += page.get_text()
+        full_text = "".join(page.get_text() for page in doc)
     
     # Choose one of the functions to run
-    chunks = semantic_chunking_langchain(full_text)
-    #chunks = chunk_by_tokens_langchain(full_text)
-    #chunks = recursive_character_chunking_langchain(full_text)
+    chunks = semantic_chunking_langchain(full_text, verbose=True)
+    #chunks = chunk_by_tokens_langchain(full_text, verbose=True)
+    #chunks = recursive_character_chunking_langchain(full_text, verbose=True)
     
     # Save the chunks to a local directory
     output_dir = chunked_doc_file
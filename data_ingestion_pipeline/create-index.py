@@ -15,6 +15,9 @@ from azure.search.documents.indexes.models import (
     VectorSearch,
     HnswAlgorithmConfiguration,
     VectorSearchProfile,
+    ScalarQuantizationCompression,
+    ScalarQuantizationParameters,
+    RescoringOptions,
     SemanticConfiguration,
     SemanticPrioritizedFields,
     SemanticField,
@@ -95,16 +98,26 @@ def create_index():
         ),
     ]
 
+    # content_vector is stored as int8 scalar-quantized vectors; the original
+    # float32 vectors are kept to rescore the oversampled candidates
     vector_search = VectorSearch(
         algorithms=[
             HnswAlgorithmConfiguration(
                 name="myHnsw"
             )
         ],
+        compressions=[
+            ScalarQuantizationCompression(
+                compression_name="myScalarQuantization",
+                parameters=ScalarQuantizationParameters(quantized_data_type="int8"),
+                rescoring_options=RescoringOptions(enable_rescoring=True, default_oversampling=4)
+            )
+        ],
         profiles=[
             VectorSearchProfile(
                 name="myHnswProfile",
                 algorithm_configuration_name="myHnsw",
+                compression_name="myScalarQuantization",
             )
         ]
     )
@@ -24,15 +24,21 @@ logging.getLogger('azure.core.pipeline.policies.http_logging_policy').setLevel(l
 
 import os
 from typing import Union, Dict, Any, List
-from functools import wraps
+from functools import wraps, lru_cache
 from dotenv import load_dotenv
-from azure.storage.blob import BlobServiceClient
+from azure.storage.blob import BlobServiceClient, ContainerClient
 from azure.core.credentials import AzureKeyCredential
+from azure.core.pipeline.transport import RequestsTransport
+# azure-core's own adapter for RequestsTransport; raises the socket block size to 32 KB
+from azure.core.pipeline.transport._requests_basic import BiggerBlockSizeHTTPAdapter
 from azure.ai.documentintelligence import DocumentIntelligenceClient  # Updated import
 from azure.ai.documentintelligence.models import AnalyzeResult
 
 
 import io
+import requests
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
 from azure.identity import DefaultAzureCredential
 
 # Load environment variables
@@ -44,6 +50,17 @@ STORAGE_ACCOUNT_CONTAINER = os.environ.get("STORAGE_ACCOUNT_CONTAINER", "documen
 SAMPLE_DOCUMENT_FILE = os.environ.get("SAMPLE_DOCUMENT_FILE")
 SAMPLE_DOCUMENT_FILE_PATH = os.environ.get("SAMPLE_DOCUMENT_FILE_PATH")
 
+# Number of files uploaded concurrently by upload_all_files_blob
+UPLOAD_MAX_WORKERS = 16
+# Number of parallel block uploads per file
+UPLOAD_MAX_CONCURRENCY = 4
+# Blobs larger than this are uploaded as staged blocks instead of a single put
+UPLOAD_MAX_SINGLE_PUT_SIZE = 8 * 1024 * 1024
+UPLOAD_MAX_BLOCK_SIZE = 4 * 1024 * 1024
+# Every concurrent block upload needs its own pooled connection; requests'
+# default pool of 10 would drop connections under upload_all_files_blob
+BLOB_CONNECTION_POOL_SIZE = UPLOAD_MAX_WORKERS * UPLOAD_MAX_CONCURRENCY
+
 # Azure Document Intelligence Configuration
 DOCUMENT_INTELLIGENCE_ENDPOINT = os.environ.get("AZURE_DOCUMENT_INTELLIGENCE_ENDPOINT")
 DOCUMENT_INTELLIGENCE_KEY = os.environ.get("AZURE_DOCUMENT_INTELLIGENCE_KEY")
@@ -76,11 +93,28 @@ def validate_storage_credentials():
             "Please check your environment variables."
         )
 
+def _blob_transport() -> RequestsTransport:
+    """Build a requests transport whose connection pool fits all concurrent uploads."""
+    session = requests.Session()
+    # Same adapter and retry settings azure-core mounts by default, with a
+    # bigger pool; retries are left to the Azure SDK retry policy
+    adapter = BiggerBlockSizeHTTPAdapter(
+        pool_connections=BLOB_CONNECTION_POOL_SIZE,
+        pool_maxsize=BLOB_CONNECTION_POOL_SIZE,
+        max_retries=Retry(total=False, redirect=False, raise_on_status=False)
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return RequestsTransport(session=session)
+
+@lru_cache(maxsize=1)
 @azure_error_handler
 def get_blob_service_client() -> BlobServiceClient:
     """
     Create and return an Azure Blob Service Client using connection string.
 
+    The client is created once and shared by all callers.
+
     Returns
     -------
     BlobServiceClient
@@ -93,15 +127,26 @@ def get_blob_service_client() -> BlobServiceClient:
     """
     try:
         params = validate_storage_credentials()
+        transfer_options = {
+            "max_single_put_size": UPLOAD_MAX_SINGLE_PUT_SIZE,
+            "max_block_size": UPLOAD_MAX_BLOCK_SIZE,
+            "transport": _blob_transport(),
+        }
         if "connection_string" in params:
-            return BlobServiceClient.from_connection_string(params["connection_string"])
+            return BlobServiceClient.from_connection_string(params["connection_string"], **transfer_options)
         else:
-            return BlobServiceClient(params["account_url"], credential=params["credential"])
+            return BlobServiceClient(params["account_url"], credential=params["credential"], **transfer_options)
     except Exception as e:
         logging.error(f"Failed to create blob service client: {str(e)}")
         raise
 
 
+@lru_cache(maxsize=None)
+def _container(container_name: str) -> ContainerClient:
+    """Return a shared container client for the given container."""
+    return get_blob_service_client().get_container_client(container_name)
+
+
 @azure_error_handler
 def upload_to_blob(file_content: Union[bytes, io.IOBase], filename: str, container_name: str = None) -> Dict[str, str]:
     """
@@ -112,7 +157,8 @@ def upload_to_blob(file_content: Union[bytes, io.IOBase], filename: str, contain
     file_content : Union[bytes, io.IOBase]
         The content of the file to upload. This can be either:
         - bytes: Raw file content (e.g., result of reading a file in binary mode)
-        - io.IOBase: A file-like object (e.g., an open file handle)
+        - io.IOBase: A file-like object (e.g., an open file handle); it is
+          streamed in blocks rather than read into memory
     filename : str
         The name to give the file in Blob Storage.
     container_name : str, optional
@@ -131,24 +177,33 @@ def upload_to_blob(file_content: Union[bytes, io.IOBase], filename: str, contain
     Exception
         If there's an error during the upload process.
     """
-    blob_service_client = get_blob_service_client()
     container_name = container_name or STORAGE_ACCOUNT_CONTAINER
-    container_client = blob_service_client.get_container_client(container_name)
+    container_client = _container(container_name)
     blob_client = container_client.get_blob_client(filename)
     
-    if isinstance(file_content, io.IOBase):
-        blob_client.upload_blob(file_content.read(), overwrite=True)
-    else:
-        blob_client.upload_blob(file_content, overwrite=True)
+    # File-like objects are handed to the SDK as-is so large files are sent
+    # with put_block/put_block_list without buffering the whole payload.
+    blob_client.upload_blob(file_content, overwrite=True, max_concurrency=UPLOAD_MAX_CONCURRENCY)
     
     print(f"File {filename} uploaded successfully")
     return {"message": f"File {filename} uploaded successfully", "blob_url": blob_client.url}
 
 
+def _upload_one(container_client, file_path: str, filename: str) -> None:
+    """Stream a single local file to the container, overwriting any existing blob."""
+    blob_client = container_client.get_blob_client(filename)
+    with open(file_path, "rb") as file:
+        blob_client.upload_blob(file, overwrite=True, max_concurrency=UPLOAD_MAX_CONCURRENCY)
+    print(f"File {filename} uploaded successfully")
+
+
 def upload_all_files_blob(local_folder_path: str, container_name: str) -> None:
     """
     Upload all PDF files from the local folder path to Azure Blob Storage container.
 
+    Files are uploaded concurrently; each file is streamed from disk rather than
+    read into memory.
+
     Parameters
     ----------
     local_folder_path : str
@@ -157,28 +212,29 @@ def upload_all_files_blob(local_folder_path: str, container_name: str) -> None:
         The name of the container to upload to.
     """
     # Get container client
-    blob_service_client = get_blob_service_client()
     container_name = container_name or STORAGE_ACCOUNT_CONTAINER
-    container_client = blob_service_client.get_container_client(container_name)
+    container_client = _container(container_name)
     
-    # Iterate over all files in the local folder path
-    for filename in os.listdir(local_folder_path):
-        if filename.endswith(".pdf"):
-            file_path = os.path.join(local_folder_path, filename)
-            blob_client = container_client.get_blob_client(filename)
-            
-            # Read the file content and upload to Azure Blob Storage
-            with open(file_path, "rb") as file:
-                blob_client.upload_blob(file, overwrite=True)
-            
-            print(f"File {filename} uploaded successfully")
+    files = [f for f in os.listdir(local_folder_path) if f.endswith(".pdf")]
+    if not files:
+        return
+
+    with ThreadPoolExecutor(max_workers=min(UPLOAD_MAX_WORKERS, len(files))) as executor:
+        # list() drains the iterator so any upload error is raised here
+        list(executor.map(
+            lambda filename: _upload_one(container_client, os.path.join(local_folder_path, filename), filename),
+            files
+        ))
 
 
+@lru_cache(maxsize=1)
 @azure_error_handler
 def get_document_intelligence_client() -> DocumentIntelligenceClient:
     """
     Create and return an Azure Document Intelligence Client using key authentication.
 
+    The client is created once and shared by all callers.
+
     Returns
     -------
     DocumentIntelligenceClient
@@ -229,6 +285,43 @@ def analyze_document(filename: str) -> AnalyzeResult:
     print("Successfully read the document from blob storage with doc intelligence and extracted text.")
     return result
 
+
+@azure_error_handler
+def analyze_all(filenames: List[str]) -> List[AnalyzeResult]:
+    """
+    Analyze several documents using Azure Document Intelligence.
+
+    All analyses are started before any result is awaited, so the service
+    processes the documents in parallel instead of one after another.
+
+    Parameters
+    ----------
+    filenames : List[str]
+        The names of the files in Blob Storage to analyze.
+
+    Returns
+    -------
+    List[AnalyzeResult]
+        The analysis results, in the same order as ``filenames``.
+
+    Raises
+    ------
+    Exception
+        If there's an error during the analysis process.
+    """
+    document_intelligence_client = get_document_intelligence_client()
+
+    pollers = []
+    for filename in filenames:
+        blob_url = f"https://{STORAGE_ACCOUNT_NAME}.blob.core.windows.net/{STORAGE_ACCOUNT_CONTAINER}/{filename}"
+        print(f"Analyzing document from blob storage: {blob_url}")
+        analyze_request = {"urlSource": blob_url}
+        pollers.append(document_intelligence_client.begin_analyze_document("prebuilt-layout", analyze_request=analyze_request))
+
+    results: List[AnalyzeResult] = [poller.result() for poller in pollers]
+    print(f"Successfully read {len(results)} documents from blob storage with doc intelligence and extracted text.")
+    return results
+
 def run_examples():
     """Example usage of the document processing functions."""
     print("Uploading local file...")
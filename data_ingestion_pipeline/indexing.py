@@ -2,28 +2,43 @@ import logging
 import os
 import hashlib
 import base64
-from typing import List, Dict, Any
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional, Iterator
 from dotenv import load_dotenv
 from azure.storage.blob import BlobServiceClient
-from azure.search.documents import SearchClient
+from azure.search.documents import SearchClient, IndexDocumentsBatch
 from azure.core.credentials import AzureKeyCredential
-from chunking import recursive_character_chunking_langchain
+from azure.core.exceptions import HttpResponseError
+from chunking import recursive_character_chunking_pages
+from pdf_extraction import PdfWorkerPool
 import fitz  # PyMuPDF
-import json
+import orjson
+import tiktoken
+import numpy as np
 from datetime import datetime, timezone
 from langchain_openai import AzureOpenAIEmbeddings
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Load environment variables
+load_dotenv()
+
+# Configure logging; LOG_LEVEL (e.g. DEBUG, INFO, WARNING) controls verbosity.
+# getLevelName maps a known level name to its number; anything else falls back to INFO.
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").strip().upper()
+_log_level = logging.getLevelName(LOG_LEVEL)
+logging.basicConfig(level=_log_level if isinstance(_log_level, int) else logging.INFO)
 logger = logging.getLogger(__name__)
+if not isinstance(_log_level, int):
+    logger.warning(f"Unknown LOG_LEVEL {LOG_LEVEL!r}, using INFO")
 
 # Suppress Azure SDK logging
 logging.getLogger('azure').setLevel(logging.ERROR)
 logging.getLogger('azure.core.pipeline.policies.http_logging_policy').setLevel(logging.ERROR)
 
-# Load environment variables
-load_dotenv()
-
 # Azure Configuration
 STORAGE_ACCOUNT_NAME = os.environ.get("STORAGE_ACCOUNT_NAME")
 STORAGE_ACCOUNT_KEY = os.environ.get("STORAGE_ACCOUNT_KEY")
@@ -35,24 +50,268 @@ AI_SEARCH_INDEX = os.environ.get("AZURE_SEARCH_INDEX")
 aoai_endpoint = os.environ.get("AOAI_ENDPOINT")
 aoai_key = os.environ.get("AOAI_KEY")
 
-embeddings_model = AzureOpenAIEmbeddings(
-    azure_deployment="text-embedding-3-large",
-    api_key=aoai_key,
-    azure_endpoint=aoai_endpoint
+# Number of documents processed concurrently; keep within the Azure OpenAI RPM quota
+INGEST_WORKERS = int(os.environ.get("INGEST_WORKERS", "8"))
+
+# Unchanged blobs are skipped only if they were indexed into the same index by
+# the same pipeline version. Bump the version whenever chunking, embeddings or
+# the index schema change; set FORCE_REINDEX=true to re-index every blob once.
+INDEX_PIPELINE_VERSION = 1
+FORCE_REINDEX = os.environ.get("FORCE_REINDEX", "false").strip().lower() in ("1", "true", "yes")
+
+# Chunks with fewer alphanumeric characters than this in total are
+# page-boundary debris (rules, leader dots, page numbers) and are not indexed
+MIN_CHUNK_ALNUM = 16
+
+# Search index upload: documents per request and attempts on throttling
+UPLOAD_BATCH_SIZE = 500
+UPLOAD_MAX_ATTEMPTS = 5
+
+# PyMuPDF is not thread-safe, so in-process PDF access is serialized across workers
+_pdf_lock = threading.Lock()
+
+# Large PDFs are split into page ranges extracted in parallel by worker
+# processes, each opening its own copy of the document
+PDF_EXTRACT_WORKERS = min(8, os.cpu_count() or 1)
+PDF_PARALLEL_MIN_PAGES = 32
+
+EMBEDDING_DEPLOYMENT = "text-embedding-3-large"
+EMBEDDING_CACHE_FILE = os.environ.get("EMBEDDING_CACHE_FILE", "embedding_cache.sqlite")
+EMBEDDING_CACHE_MAX_ENTRIES = 10000
+# Vectors also kept in memory; at 3072 float32 dimensions each takes about 12 KB
+EMBEDDING_CACHE_MEMORY_ENTRIES = 2000
+# Recency updates for cache hits are written in batches rather than per lookup
+EMBEDDING_CACHE_TOUCH_FLUSH = 256
+
+class CachedEmbedder:
+    """
+    Wrap an embeddings model with a content-hash LRU cache.
+
+    Vectors are keyed by sha256(model name + chunk text) and kept in two tiers:
+    a small in-memory LRU and a sqlite file, so unchanged chunks are not
+    re-embedded on later runs. Both tiers store vectors as raw float32 bytes
+    and convert them to lists only when returned. The sqlite tier holds at most
+    max_entries vectors and is only opened on the first lookup, not when the
+    module is imported.
+    """
+
+    def __init__(self, inner, model_name: str, cache_file: str, max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES,
+                 memory_entries: int = EMBEDDING_CACHE_MEMORY_ENTRIES):
+        self.inner = inner
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self._memory: "OrderedDict[bytes, bytes]" = OrderedDict()
+        # last_used times of cache hits not yet written to sqlite
+        self._touched: Dict[bytes, float] = {}
+        self.cache_file = cache_file
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the sqlite cache on first use; callers must hold self._lock."""
+        if self._db is None:
+            self._db = sqlite3.connect(self.cache_file, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS cache (key BLOB PRIMARY KEY, vec BLOB NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS cache_last_used ON cache (last_used)")
+            self._db.commit()
+        return self._db
+
+    def _key(self, text: str) -> bytes:
+        return hashlib.sha256((self.model_name + "\0" + text).encode()).digest()
+
+    @staticmethod
+    def _to_bytes(vector: List[float]) -> bytes:
+        return np.asarray(vector, dtype=np.float32).tobytes()
+
+    @staticmethod
+    def _to_list(vec: bytes) -> List[float]:
+        return np.frombuffer(vec, dtype=np.float32).tolist()
+
+    def _remember(self, key: bytes, vec: bytes) -> None:
+        self._memory[key] = vec
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _flush_touched(self, db: sqlite3.Connection) -> None:
+        """Write pending last_used updates; callers must hold self._lock and commit."""
+        if self._touched:
+            db.executemany("UPDATE cache SET last_used = ? WHERE key = ?",
+                           [(used, key) for key, used in self._touched.items()])
+            self._touched.clear()
+
+    def _lookup(self, keys: List[bytes]) -> Dict[bytes, bytes]:
+        """Return the cached vectors for the given keys, marking them recently used."""
+        found = {}
+        with self._lock:
+            db = self._connection()
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+            for key in set(keys) - found.keys():
+                row = db.execute("SELECT vec FROM cache WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    found[key] = row[0]
+                    self._remember(key, row[0])
+            now = time.time()
+            self._touched.update((key, now) for key in found)
+            if len(self._touched) >= EMBEDDING_CACHE_TOUCH_FLUSH:
+                self._flush_touched(db)
+                db.commit()
+        return found
+
+    def _store(self, items: Dict[bytes, bytes]) -> None:
+        with self._lock:
+            db = self._connection()
+            now = time.time()
+            for key, vec in items.items():
+                self._remember(key, vec)
+            self._flush_touched(db)
+            db.executemany(
+                "INSERT OR REPLACE INTO cache (key, vec, last_used) VALUES (?, ?, ?)",
+                [(key, vec, now) for key, vec in items.items()]
+            )
+            # Evict the least recently used rows only once the cap is exceeded
+            excess = db.execute("SELECT COUNT(*) FROM cache").fetchone()[0] - self.max_entries
+            if excess > 0:
+                db.execute(
+                    "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY last_used LIMIT ?)",
+                    (excess,)
+                )
+            db.commit()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts, calling the wrapped model once per distinct cache miss."""
+        keys = [self._key(text) for text in texts]
+        found = self._lookup(keys)
+        misses = {key: text for key, text in zip(keys, texts) if key not in found}
+        if misses:
+            new_vectors = self.inner.embed_documents(list(misses.values()))
+            computed = {key: self._to_bytes(vector) for key, vector in zip(misses, new_vectors)}
+            self._store(computed)
+            found.update(computed)
+        return [self._to_list(found[key]) for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single text, calling the wrapped model only on a cache miss."""
+        key = self._key(text)
+        found = self._lookup([key])
+        if key in found:
+            return self._to_list(found[key])
+        vector = self.inner.embed_query(text)
+        self._store({key: self._to_bytes(vector)})
+        return vector
+
+embeddings_model = CachedEmbedder(
+    AzureOpenAIEmbeddings(
+        azure_deployment=EMBEDDING_DEPLOYMENT,
+        api_key=aoai_key,
+        azure_endpoint=aoai_endpoint
+    ),
+    model_name=EMBEDDING_DEPLOYMENT,
+    cache_file=EMBEDDING_CACHE_FILE
 )
 
+# Embedding request limits: inputs per call and total tokens per call
+EMBED_BATCH_SIZE = 16
+EMBED_BATCH_MAX_TOKENS = 8000
+# Embedding requests in flight at once, shared by all documents being processed
+EMBED_MAX_CONCURRENCY = 16
+embedding_encoding = tiktoken.get_encoding("cl100k_base")
+
+def _embedding_batches(texts: List[str]) -> List[List[int]]:
+    """Group text indices into batches within the embedding request limits."""
+    token_counts = [len(tokens) for tokens in embedding_encoding.encode_ordinary_batch(texts)]
+    batches = []
+    current, current_tokens = [], 0
+    for i, token_count in enumerate(token_counts):
+        if current and (len(current) == EMBED_BATCH_SIZE or current_tokens + token_count > EMBED_BATCH_MAX_TOKENS):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(i)
+        current_tokens += token_count
+    if current:
+        batches.append(current)
+    return batches
+
+_embedding_executor = ThreadPoolExecutor(max_workers=EMBED_MAX_CONCURRENCY)
+
+def _embed_batch(texts: List[str]) -> List[Optional[List[float]]]:
+    """
+    Embed one request-sized batch of texts.
+
+    If the batch request fails, its texts are retried one at a time so a single
+    bad input does not lose the whole batch. Texts that still fail get None.
+    """
+    try:
+        return embeddings_model.embed_documents(texts)
+    except Exception as e:
+        logger.warning(f"Batch embedding failed, retrying {len(texts)} texts individually: {str(e)}")
+    vectors: List[Optional[List[float]]] = []
+    for text in texts:
+        try:
+            vectors.append(embeddings_model.embed_query(text))
+        except Exception as e:
+            logger.error(f"Error generating vector embedding: {str(e)}")
+            vectors.append(None)
+    return vectors
+
+def embed_texts(texts: List[str]) -> List[Optional[List[float]]]:
+    """
+    Embed texts in as few requests as the embedding limits allow.
+
+    Batches are sent concurrently on a shared pool, so at most
+    EMBED_MAX_CONCURRENCY requests are in flight across all documents.
+    Texts whose embedding failed get None.
+    """
+    vectors: List[Optional[List[float]]] = [None] * len(texts)
+    batches = _embedding_batches(texts)
+    results = _embedding_executor.map(lambda batch: _embed_batch([texts[i] for i in batch]), batches)
+    for batch, batch_vectors in zip(batches, results):
+        for i, vector in zip(batch, batch_vectors):
+            vectors[i] = vector
+    return vectors
+
+def extract_page_texts(pdf_path: str, pdf_pool: Optional[PdfWorkerPool] = None) -> Iterator[str]:
+    """
+    Yield the text of each page of a PDF file, in page order.
+
+    Small documents, or any document when no pdf_pool is given, are read
+    in-process, one page at a time. Larger ones are split into one page range per worker process
+    so extraction runs on several cores; workers open the file themselves, so
+    the PDF bytes are never copied between processes.
+    """
+    with _pdf_lock, fitz.open(pdf_path, filetype="pdf") as doc:
+        page_count = doc.page_count
+        if pdf_pool is None or page_count < PDF_PARALLEL_MIN_PAGES or PDF_EXTRACT_WORKERS == 1:
+            # Pages are yielded one at a time with the lock held, so the
+            # caller's chunking of this document also runs under it; chunking
+            # holds the GIL anyway, so little concurrency is lost.
+            for page in doc:
+                yield page.get_text("text", sort=False)
+            return
+
+    range_size = -(-page_count // PDF_EXTRACT_WORKERS)
+    starts = range(0, page_count, range_size)
+    ranges = [(start, min(start + range_size, page_count)) for start in starts]
+    for range_texts in pdf_pool.extract_page_ranges(pdf_path, ranges):
+        yield from range_texts
+
 def validate_base64(string: str) -> bool:
     """Validate if a string is base64 encoded."""
+    # Check for a non-empty string with valid base64 length
+    if not string or len(string) % 4 != 0:
+        return False
+    # validate=True rejects characters outside the base64 alphabet and bad padding;
+    # binascii.Error and non-ASCII input both surface as ValueError
     try:
-        if string is None:
-            return False
-        # Check if the string has valid base64 length
-        if len(string) % 4 != 0:
-            return False
-        # Try to decode
-        base64.b64decode(string)
+        base64.b64decode(string, validate=True)
         return True
-    except Exception:
+    except ValueError:
         return False
 
 def validate_azure_credentials():
@@ -95,29 +354,31 @@ class DocumentProcessor:
             self.blob_service_client.get_service_properties()
             logger.info("Successfully connected to Azure Blob Storage")
             
-            # Load or create document metadata
+            # Load document metadata, keyed by blob name. Older files hold a
+            # list of entries with an "id" field; they are rewritten as a dict.
             self.metadata_file = 'doc_metadata.json'
+            self.document_metadata = {}
             if os.path.exists(self.metadata_file):
-                with open(self.metadata_file, 'r') as f:
-                    metadata_list = json.load(f)
-            else:
-                metadata_list = []
-                with open(self.metadata_file, 'w') as f:
-                    json.dump(metadata_list, f)
-            self.document_metadata = {doc["id"]: doc for doc in metadata_list}
+                with open(self.metadata_file, 'rb') as f:
+                    data = orjson.loads(f.read())
+                self.document_metadata = data if isinstance(data, dict) else {doc["id"]: doc for doc in data}
             
         except Exception as e:
             logger.error(f"Failed to initialize DocumentProcessor: {str(e)}")
             raise
 
-    def process_document(self, blob_name: str, chunk_size: int = 1000, chunk_overlap: int = 100) -> None:
+    def process_document(self, blob_name: str, chunk_size: int = 1000, chunk_overlap: int = 100,
+                         pdf_pool: Optional[PdfWorkerPool] = None) -> bool:
         """
         Process a single document from Azure Blob Storage:
         1. Read the PDF document
         2. Chunk the content while maintaining page numbers
         3. Upload chunks to the search index
+
+        Large PDFs are extracted on pdf_pool when one is given.
+        Returns True only if every chunk was embedded and accepted by the index.
         """
-        print(f"Processing document: {blob_name}")
+        logger.info(f"Processing document: {blob_name}")
         
         # Get document metadata
         doc_metadata = self.document_metadata.get(blob_name, {})
@@ -127,87 +388,206 @@ class DocumentProcessor:
         # Generate blob URL
         blob_url = f"https://{STORAGE_ACCOUNT_NAME}.blob.core.windows.net/{STORAGE_ACCOUNT_CONTAINER}/{blob_name}"
         
-        # Read PDF document from Azure Blob Storage
+        # Read PDF document from Azure Blob Storage. The blob is streamed to a
+        # temporary file rather than buffered in memory, and PyMuPDF reads
+        # pages from disk on demand.
         blob_client = self.blob_service_client.get_blob_client(container=STORAGE_ACCOUNT_CONTAINER, blob=blob_name)
-        pdf_data = blob_client.download_blob().readall()
-        
-        # Extract text with page numbers
-        full_text = ""
-        with fitz.open(stream=pdf_data, filetype="pdf") as doc:
-            page_number = 1
-            for page in doc:
-                page_text = page.get_text()
-                page_text += f'###Page Number: {page_number}###\n\n'
-                full_text += page_text
-                page_number += 1
+        with tempfile.TemporaryDirectory() as temp_dir:
+            pdf_path = os.path.join(temp_dir, "document.pdf")
+            with open(pdf_path, "wb") as f:
+                blob_client.download_blob().readinto(f)
+            
+            # Extract and chunk the text page by page; each chunk carries its page number
+            logger.debug("Chunking document")
+            chunks_with_pages = [
+                (chunk, page_number)
+                for chunk, page_number in recursive_character_chunking_pages(extract_page_texts(pdf_path, pdf_pool))
+                if sum(map(str.isalnum, chunk)) >= MIN_CHUNK_ALNUM
+            ]
+        chunks = [chunk for chunk, _ in chunks_with_pages]
 
-        # Chunk the document
-        print("Chunking document")
-        chunks = recursive_character_chunking_langchain(full_text)
+        # Generate vector embeddings in batched requests, embedding repeated
+        # chunks (headers, footers, TOC fragments) only once
+        unique_chunks = list(dict.fromkeys(chunks))
+        vector_by_text = dict(zip(unique_chunks, embed_texts(unique_chunks)))
+        content_vectors = [vector_by_text[chunk] for chunk in chunks]
 
         # Process and upload chunks
         documents = []
-        current_page = 1
+        failed_chunks = 0
+        blob_prefix = hashlib.sha256(blob_name.encode()).digest()
+        # Metadata shared by every chunk of this document
+        base_document = {
+            "source_file": blob_name,
+            "category": category,
+            "sensitivity_label": sensitivity_label,
+            "created_date": datetime.now(timezone.utc).isoformat()
+        }
         
-        for i, chunk in enumerate(chunks):
-            # Find page numbers in chunk
-            page_numbers = []
-            lines = chunk.split('\n')
-            for line in lines:
-                if '###Page Number:' in line:
-                    try:
-                        page_num = int(line.split('###Page Number:')[1].split('###')[0].strip())
-                        page_numbers.append(page_num)
-                    except ValueError:
-                        continue
-
-            # Determine page range for chunk
-            if page_numbers:
-                chunk_start_page = page_numbers[0]
-                chunk_end_page = page_numbers[-1] if len(page_numbers) > 1 else page_numbers[0]
-                current_page = chunk_end_page
-            else:
-                chunk_start_page = current_page
-                chunk_end_page = current_page
-
+        for i, (chunk, page_number) in enumerate(chunks_with_pages):
             # Generate unique ID for chunk
-            chunk_id = hashlib.md5((blob_name + str(i)).encode()).hexdigest()
+            chunk_id = hashlib.sha256(blob_prefix + i.to_bytes(4, "little")).hexdigest()[:32]
 
-            # Generate vector embedding for chunk
-            try:
-                content_vector = embeddings_model.embed_query(chunk)
-            except Exception as e:
-                print(f"Error generating vector embedding for chunk {chunk_id} in {blob_name}: {str(e)}")
+            content_vector = content_vectors[i]
+            if content_vector is None:
+                logger.error(f"Error generating vector embedding for chunk {chunk_id} in {blob_name}")
+                failed_chunks += 1
                 continue
 
             # Create document for indexing with metadata
-            document = {
+            documents.append({
+                **base_document,
                 "id": chunk_id,
-                "source_file": blob_name,
-                "source_pages": [p for p in range(chunk_start_page, chunk_end_page + 1)],
+                "source_pages": [page_number],
                 "content": chunk,
-                "content_vector": content_vector,
-                "category": category,
-                "sensitivity_label": sensitivity_label,
-                "created_date": datetime.now(timezone.utc).isoformat()
-            }
-            documents.append(document)
+                "content_vector": content_vector
+            })
 
         # Upload chunks to search index
-        print(f"Uploading {len(documents)} chunks to search index")
-        self.search_client.upload_documents(documents)
-        print(f"Successfully processed and indexed document: {blob_name}")
+        logger.debug(f"Uploading {len(documents)} chunks to search index")
+        for start in range(0, len(documents), UPLOAD_BATCH_SIZE):
+            failed_chunks += len(self.upload_batch(documents[start:start + UPLOAD_BATCH_SIZE]))
+
+        if failed_chunks:
+            logger.warning(f"Indexed document {blob_name} with {failed_chunks} of {len(chunks)} chunks missing")
+            return False
+        logger.info(f"Successfully processed and indexed document: {blob_name}")
+        return True
+
+    def upload_batch(self, documents: List[Dict[str, Any]]) -> List[str]:
+        """
+        Upload one batch of documents to the search index.
+
+        Throttling (429/503) is retried with exponential backoff, whether the
+        whole request is rejected or the index reports it per document in a
+        207 response; only the throttled documents are re-sent. Batches
+        rejected as too large (413) need no handling here: the SDK's
+        index_documents already splits them in half and retries each half.
+
+        Returns the keys of the documents the index failed to accept.
+        """
+        failed = []
+        pending = documents
+        for attempt in range(UPLOAD_MAX_ATTEMPTS):
+            batch = IndexDocumentsBatch()
+            batch.add_upload_actions(pending)
+            try:
+                results = self.search_client.index_documents(batch)
+            except HttpResponseError as e:
+                if e.status_code in (429, 503) and attempt < UPLOAD_MAX_ATTEMPTS - 1:
+                    time.sleep(2 ** attempt)
+                    continue
+                raise
+            throttled = {result.key for result in results if not result.succeeded and result.status_code in (429, 503)}
+            failed.extend(result.key for result in results if not result.succeeded and result.key not in throttled)
+            if not throttled:
+                break
+            if attempt == UPLOAD_MAX_ATTEMPTS - 1:
+                failed.extend(throttled)
+                break
+            pending = [document for document in pending if document["id"] in throttled]
+            time.sleep(2 ** attempt)
+        if failed:
+            logger.error(f"Failed to index {len(failed)} of {len(documents)} chunks: {', '.join(failed)}")
+        return failed
+
+    def save_metadata(self) -> None:
+        """Atomically rewrite the metadata file (write to a temp file, then rename)."""
+        temp_file = f"{self.metadata_file}.tmp"
+        with open(temp_file, 'wb') as f:
+            f.write(orjson.dumps(self.document_metadata, option=orjson.OPT_INDENT_2))
+        os.replace(temp_file, self.metadata_file)
+
+    def _index_state(self, blob_name: str) -> Dict[str, Any]:
+        """Return what, besides the blob content, the indexed chunks of a blob depend on."""
+        doc_metadata = self.document_metadata.get(blob_name, {})
+        return {
+            "index": AI_SEARCH_INDEX,
+            "pipeline_version": INDEX_PIPELINE_VERSION,
+            "category": doc_metadata.get("category"),
+            "sensitivity_label": doc_metadata.get("sensitivity_label"),
+        }
+
+    def is_unchanged(self, blob) -> bool:
+        """
+        Return True if the blob was already indexed as it is now.
+
+        The blob's ETag or MD5 must match the ones recorded when it was last
+        indexed, and so must the target index, the pipeline version and the
+        blob's category and sensitivity label.
+        """
+        if FORCE_REINDEX:
+            return False
+        indexed = self.document_metadata.get(blob.name, {}).get("indexed")
+        if not indexed:
+            return False
+        state = self._index_state(blob.name)
+        if {key: indexed.get(key) for key in state} != state:
+            return False
+        if indexed.get("etag") == blob.etag:
+            return True
+        content_md5 = blob.content_settings.content_md5
+        # Re-uploading an identical file changes the ETag but not the MD5
+        return bool(content_md5) and indexed.get("content_md5") == base64.b64encode(content_md5).decode()
+
+    def record_indexed(self, blob) -> None:
+        """
+        Remember how the blob was indexed so an unchanged blob is skipped next run.
+
+        The record is kept under its own "indexed" key, apart from the
+        user-authored fields such as category and sensitivity_label, so it can be
+        reset without touching them.
+        """
+        content_md5 = blob.content_settings.content_md5
+        # etag/content_md5 at the top level are the old record format
+        doc_metadata = {
+            key: value for key, value in self.document_metadata.get(blob.name, {}).items()
+            if key not in ("etag", "content_md5")
+        }
+        self.document_metadata[blob.name] = {
+            **doc_metadata,
+            "id": blob.name,
+            "indexed": {
+                **self._index_state(blob.name),
+                "etag": blob.etag,
+                "content_md5": base64.b64encode(content_md5).decode() if content_md5 else None,
+            },
+        }
+        self.save_metadata()
 
     def process_all_documents(self) -> None:
-        """Process all documents in the configured Azure Blob Storage container."""
+        """
+        Process all documents in the configured Azure Blob Storage container.
+
+        Blobs already indexed as they are now (see is_unchanged) are skipped
+        without being downloaded, unless FORCE_REINDEX is set. A blob is only
+        recorded once all of its chunks are in the index, so partly indexed
+        documents are retried on the next run. The rest are processed on a
+        thread pool so blob downloads, embedding calls and index uploads of
+        different documents overlap. The blob and search clients are shared,
+        and document_metadata is only updated from this thread. Large PDFs are
+        extracted on one process pool that is started before the threads and
+        shared by them.
+        """
         container_client = self.blob_service_client.get_container_client(STORAGE_ACCOUNT_CONTAINER)
         
-        for blob in container_client.list_blobs():
-            try:
-                self.process_document(blob.name)
-            except Exception as e:
-                print(f"Error processing document {blob.name}: {str(e)}")
-                continue
+        with PdfWorkerPool(PDF_EXTRACT_WORKERS) as pdf_pool, \
+                ThreadPoolExecutor(max_workers=INGEST_WORKERS) as executor:
+            futures = {}
+            for blob in container_client.list_blobs():
+                if self.is_unchanged(blob):
+                    logger.info(f"Skipping unchanged document: {blob.name}")
+                    continue
+                futures[executor.submit(self.process_document, blob.name, pdf_pool=pdf_pool)] = blob
+            for future in as_completed(futures):
+                blob = futures[future]
+                try:
+                    fully_indexed = future.result()
+                except Exception as e:
+                    logger.error(f"Error processing document {blob.name}: {str(e)}")
+                    continue
+                if fully_indexed:
+                    self.record_indexed(blob)
 
 def main():
     """Main function to run the document processing pipeline."""
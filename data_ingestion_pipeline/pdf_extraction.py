@@ -0,0 +1,73 @@
+"""
+Parallel page-text extraction for large PDFs.
+
+Kept apart from indexing.py so workers can unpickle extract_page_range
+without importing indexing by name. Note that spawned workers still re-import
+the script that was started (indexing.py when run directly) as __mp_main__,
+so each worker pays its import cost once: dotenv, the embeddings client and
+the tiktoken encodings. The pool lives for the whole run, so this happens once
+per worker rather than once per document.
+"""
+
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Iterator, Tuple
+import fitz  # PyMuPDF
+
+def extract_page_range(pdf_path: str, start: int, stop: int) -> List[str]:
+    """Extract the text of pages [start, stop) in a worker process."""
+    with fitz.open(pdf_path, filetype="pdf") as doc:
+        return [doc[i].get_text("text", sort=False) for i in range(start, stop)]
+
+class PdfWorkerPool:
+    """
+    Process pool that extracts page ranges of PDF files.
+
+    Workers are started with the spawn method, so they never inherit the
+    parent's threads, held locks or open PyMuPDF documents. Use it as a context
+    manager. If a worker dies, the pool is replaced so that only the documents
+    being extracted at that moment fail.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def __enter__(self) -> "PdfWorkerPool":
+        self._executor = self._new_executor()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+
+    def extract_page_ranges(self, pdf_path: str, ranges: List[Tuple[int, int]]) -> Iterator[List[str]]:
+        """Yield the page texts of each (start, stop) range, in order."""
+        with self._lock:
+            executor = self._executor
+        if executor is None:
+            raise RuntimeError("PdfWorkerPool is not open")
+
+        starts, stops = zip(*ranges)
+        try:
+            yield from executor.map(extract_page_range, [pdf_path] * len(ranges), starts, stops)
+        except BrokenProcessPool:
+            # Replace the pool once, however many threads saw it break
+            with self._lock:
+                replaced = self._executor is executor
+                if replaced:
+                    self._executor = self._new_executor()
+            if replaced:
+                executor.shutdown(wait=False)
+            raise
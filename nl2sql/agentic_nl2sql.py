@@ -13,6 +13,7 @@ from langgraph.graph import StateGraph, START, END
 from typing import Dict, Any, TypedDict
 from typing import Annotated
 from operator import add
+from functools import lru_cache
 
 # Load environment variables
 load_dotenv()
@@ -63,6 +64,11 @@ embeddings_model = AzureOpenAIEmbeddings(
     azure_endpoint=aoai_endpoint
 )
 
+@lru_cache(maxsize=4096)
+def _embed_cached(text: str) -> tuple:
+    """Embed an entity name; names repeated across questions reuse the earlier vector."""
+    return tuple(embeddings_model.embed_query(text))
+
 
 # SQL Server configuration from environment variables
 conn_str = (
@@ -150,7 +156,7 @@ def search_dimensions(state: ChatInteractionState) -> ChatInteractionState:
     Perform hybrid search for each entity and format results.
     """
     def generate_embeddings(text, model="text-embedding-ada-002"):
-        return embeddings_model.embed_query(text)
+        return list(_embed_cached(text))
 
     search_results_dict = {}
     